@@ -10,17 +10,28 @@ It verifies:
 - simple best-practice nudges
 
 Usage:
-  python audit_dbt_setup.py
+  python audit_dbt_setup.py [--json | --no-json]   # audits the script's directory
+  build/audit/audit_dbt_setup [--json | --no-json]  # compiled: audits the current directory
+
+The JSON section is printed when stdout is not a terminal (CI, pipes) or
+with --json; --no-json suppresses it.
+
+`make audit-binary` builds the standalone executable with Nuitka for faster CI
+startup. The compiled binary audits the current working directory, so run it
+from the project root.
 
 Exit codes:
   0 = OK (no blocking issues found)
   1 = Issues found
 """
 from __future__ import annotations
+import argparse
+import functools
 import os
 import sys
 import json
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
 try:
     import yaml  # type: ignore
@@ -28,171 +39,306 @@ except Exception:
     print("ERROR: PyYAML is required. Install with: pip install pyyaml", file=sys.stderr)
     sys.exit(1)
 
-ROOT = os.path.dirname(os.path.abspath(__file__))
+try:
+    from yaml import CSafeLoader as _Loader  # libyaml C scanner/parser
+except ImportError:
+    from yaml import SafeLoader as _Loader  # type: ignore
+    print(
+        "WARNING: PyYAML was built without libyaml; YAML parsing will be slow. "
+        "Reinstall with: pip install --force-reinstall pyyaml",
+        file=sys.stderr,
+    )
+
+if "__compiled__" in globals():
+    # Nuitka build: __file__ points into the onefile unpack directory
+    ROOT = os.getcwd()
+    _ROOT_SOURCE = "compiled build: the current working directory"
+else:
+    ROOT = os.path.dirname(os.path.abspath(__file__))
+    _ROOT_SOURCE = "the script's directory"
+
+# Files audited by main, as (absolute path, path relative to ROOT)
+_DBT_PROJECT = (os.path.join(ROOT, "dbt_project.yml"), "dbt_project.yml")
+_PROFILES = (os.path.join(ROOT, "profiles.yml"), "profiles.yml")
+_MODELS_SCHEMA = (os.path.join(ROOT, "models", "schema.yml"), os.path.join("models", "schema.yml"))
+_MODELS_SOURCES = (os.path.join(ROOT, "models", "sources.yml"), os.path.join("models", "sources.yml"))
+
+# (problems, warnings) reported by a single check
+Findings = Tuple[List[str], List[str]]
+
+# Accepted values for the top-level 'version' key of schema/sources YAML
+_V2 = (2, "2")
 
-PROBLEMS: List[str] = []
-WARNINGS: List[str] = []
+# dbt_project.yml path keys checked by check_paths, and whether each is required
+PATH_KEYS: Tuple[Tuple[str, bool], ...] = (
+    ("model-paths", True),
+    ("analysis-paths", False),
+    ("test-paths", False),
+    ("seed-paths", False),
+    ("macro-paths", False),
+    ("snapshot-paths", False),
+)
 
+# Parsed YAML keyed by (path, mtime_ns, size) so repeated loads of an unchanged
+# file skip the parse.
+_YAML_CACHE: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
 
-def load_yaml(path: str) -> Dict[str, Any]:
-    if not os.path.exists(path):
-        PROBLEMS.append(f"Missing file: {os.path.relpath(path, ROOT)}")
-        return {}
+
+def load_yaml(path: str, rel_path: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Parse ``path`` and return ``(data, problem)``; safe to call from threads.
+
+    ``rel_path`` is the name used in problem messages (default: relative to ROOT).
+    """
+    if rel_path is None:
+        rel_path = os.path.relpath(path, ROOT)
+    # Read the whole file with one os.read rather than going through the
+    # buffered text IO layer; dbt YAMLs are small and libyaml takes bytes.
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+    except (FileNotFoundError, NotADirectoryError):
+        return {}, f"Missing file: {rel_path}"
+    except OSError as e:
+        return {}, f"Failed to read YAML: {rel_path} ({e})"
+    try:
+        st = os.fstat(fd)
+        key = (path, st.st_mtime_ns, st.st_size)
+        cached = _YAML_CACHE.get(key)
+        if cached is not None:
+            return cached, None
+        chunks = []
+        while chunk := os.read(fd, max(st.st_size, 1 << 16)):
+            chunks.append(chunk)
+    except OSError as e:
+        return {}, f"Failed to read YAML: {rel_path} ({e})"
+    finally:
+        os.close(fd)
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f) or {}
+        data = yaml.load(b"".join(chunks).decode("utf-8"), Loader=_Loader) or {}
     except Exception as e:
-        PROBLEMS.append(f"Failed to parse YAML: {os.path.relpath(path, ROOT)} ({e})")
-        return {}
+        return {}, f"Failed to parse YAML: {rel_path} ({e})"
+    _YAML_CACHE[key] = data
+    return data, None
+
+
+def load_all_yaml(
+    paths: Dict[str, Tuple[str, str]]
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Parse every ``(path, rel_path)`` in ``paths`` concurrently, keyed like ``paths``.
+
+    Load problems are returned in ``paths`` order so the report is stable.
+    """
+    with ThreadPoolExecutor(max_workers=len(paths)) as ex:
+        results = list(ex.map(lambda p: load_yaml(*p), paths.values()))
+    parsed: Dict[str, Dict[str, Any]] = {}
+    problems: List[str] = []
+    for name, (data, problem) in zip(paths, results):
+        if problem:
+            problems.append(problem)
+        parsed[name] = data
+    return parsed, problems
 
 
-def check_project_and_profile() -> None:
-    project_path = os.path.join(ROOT, "dbt_project.yml")
-    profiles_path = os.path.join(ROOT, "profiles.yml")
+# Filesystem lookups for check_paths, cached for the life of the process; an
+# audit run is short and does not expect the tree to change underneath it.
+@functools.lru_cache(maxsize=None)
+def _subdirs(path: str) -> FrozenSet[str]:
+    with os.scandir(path) as it:
+        return frozenset(e.name for e in it if _entry_is_dir(e))
 
-    project = load_yaml(project_path)
-    profiles = load_yaml(profiles_path)
 
+def _entry_is_dir(entry: os.DirEntry) -> bool:
+    # Like os.path.isdir, treat an entry that cannot be stat'ed (e.g. a
+    # symlink loop) as not a directory instead of raising
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+@functools.lru_cache(maxsize=256)
+def _isdir(path: str) -> bool:
+    return os.path.isdir(path)
+
+
+def check_project_and_profile(project: Dict[str, Any], profiles: Dict[str, Any]) -> Findings:
+    problems: List[str] = []
+    warnings: List[str] = []
     # Basic existence
     if not project:
-        return
+        return problems, warnings
     if not profiles:
-        return
+        return problems, warnings
 
     # Check project name and profile linkage
     proj_name = project.get("name")
     profile_name = project.get("profile")
     if not proj_name:
-        PROBLEMS.append("dbt_project.yml: 'name' is required")
+        problems.append("dbt_project.yml: 'name' is required")
     if not profile_name:
-        PROBLEMS.append("dbt_project.yml: 'profile' is required")
+        problems.append("dbt_project.yml: 'profile' is required")
 
     # Profile should exist
-    if profile_name and profile_name not in profiles:
-        PROBLEMS.append(
+    if not profile_name:
+        return problems, warnings
+    if profile_name not in profiles:
+        problems.append(
             f"profiles.yml: profile '{profile_name}' not found (profiles defined: {list(profiles.keys())})"
         )
+        return problems, warnings
 
     # Targets
-    if profile_name and profile_name in profiles:
-        prof = profiles[profile_name]
-        target = prof.get("target")
-        outputs = prof.get("outputs") or {}
-        if not outputs:
-            PROBLEMS.append(f"profiles.yml: profile '{profile_name}' has no outputs")
-        if target and target not in outputs:
-            PROBLEMS.append(
-                f"profiles.yml: target '{target}' not defined under outputs for profile '{profile_name}'"
-            )
+    prof = profiles[profile_name]
+    target = prof.get("target")
+    outputs = prof.get("outputs") or {}
+    if not outputs:
+        problems.append(f"profiles.yml: profile '{profile_name}' has no outputs")
+    if target and target not in outputs:
+        problems.append(
+            f"profiles.yml: target '{target}' not defined under outputs for profile '{profile_name}'"
+        )
 
-        # BigQuery specifics (non-blocking checks)
-        for out_name, out in outputs.items():
-            if out.get("type") != "bigquery":
-                WARNINGS.append(
-                    f"profiles.yml: output '{out_name}' type is '{out.get('type')}', expected 'bigquery' for this project"
+    # BigQuery specifics (non-blocking checks)
+    for out_name, out in outputs.items():
+        out_type = out.get("type")
+        if out_type != "bigquery":
+            warnings.append(
+                f"profiles.yml: output '{out_name}' type is '{out_type}', expected 'bigquery' for this project"
+            )
+        if out.get("method") == "service-account":
+            keyfile = out.get("keyfile")
+            if isinstance(keyfile, str) and keyfile.strip() == "":
+                warnings.append(
+                    f"profiles.yml: output '{out_name}' uses service-account but keyfile is empty string; set GOOGLE_APPLICATION_CREDENTIALS or use oauth target"
                 )
-            if out.get("method") == "service-account":
-                keyfile = out.get("keyfile")
-                if isinstance(keyfile, str) and keyfile.strip() == "":
-                    WARNINGS.append(
-                        f"profiles.yml: output '{out_name}' uses service-account but keyfile is empty string; set GOOGLE_APPLICATION_CREDENTIALS or use oauth target"
-                    )
+    return problems, warnings
 
 
-def check_paths() -> None:
-    project_path = os.path.join(ROOT, "dbt_project.yml")
-    project = load_yaml(project_path)
+def check_paths(project: Dict[str, Any]) -> Findings:
+    problems: List[str] = []
+    warnings: List[str] = []
     if not project:
-        return
-    path_keys = [
-        ("model-paths", True),
-        ("analysis-paths", False),
-        ("test-paths", False),
-        ("seed-paths", False),
-        ("macro-paths", False),
-        ("snapshot-paths", False),
-    ]
-    for key, required in path_keys:
+        return problems, warnings
+    # One directory listing of ROOT answers the common case of top-level
+    # paths ("models", "macros", ...) without a stat per path. A name missing
+    # from the listing is still checked with isdir, because the filesystem may
+    # match names case- or normalization-insensitively (macOS, Windows).
+    root_dirs = _subdirs(ROOT)
+    for key, required in PATH_KEYS:
         paths = project.get(key) or []
         if required and not paths:
-            PROBLEMS.append(f"dbt_project.yml: '{key}' missing or empty")
+            problems.append(f"dbt_project.yml: '{key}' missing or empty")
         for p in paths:
-            abs_p = os.path.join(ROOT, p)
-            if not os.path.isdir(abs_p):
-                WARNINGS.append(f"Path '{p}' (from {key}) does not exist yet; create if needed")
+            rel_p = os.path.normpath(p)
+            if rel_p in root_dirs and os.path.basename(rel_p) == rel_p:
+                continue
+            if not _isdir(os.path.join(ROOT, p)):
+                warnings.append(f"Path '{p}' (from {key}) does not exist yet; create if needed")
+    return problems, warnings
 
 
-def check_models_yaml() -> None:
-    schema_yml = os.path.join(ROOT, "models", "schema.yml")
-    data = load_yaml(schema_yml)
+def check_models_yaml(data: Dict[str, Any]) -> Findings:
+    problems: List[str] = []
+    warnings: List[str] = []
     if not data:
-        return
-    if data.get("version") not in (2, "2"):
-        WARNINGS.append("models/schema.yml: 'version: 2' is recommended")
+        return problems, warnings
+    if data.get("version") not in _V2:
+        warnings.append("models/schema.yml: 'version: 2' is recommended")
     models = data.get("models")
     if not isinstance(models, list):
-        PROBLEMS.append("models/schema.yml: 'models' should be a list")
-        return
+        problems.append("models/schema.yml: 'models' should be a list")
+        return problems, warnings
     # Light validation of accepted_values syntax if present
-    for m in models:
-        cols = (m or {}).get("columns") or []
-        for c in cols:
-            tests = (c or {}).get("tests") or []
-            for t in tests:
-                if isinstance(t, dict) and "accepted_values" in t:
-                    av = t["accepted_values"]
-                    if isinstance(av, dict) and "arguments" in av and "values" not in av:
-                        PROBLEMS.append(
-                            "models/schema.yml: 'accepted_values' should be 'values: [...]' (not under 'arguments')"
-                        )
-
-
-def check_sources_yaml() -> None:
-    sources_yml = os.path.join(ROOT, "models", "sources.yml")
-    data = load_yaml(sources_yml)
+    tests = (
+        t
+        for m in models if m
+        for c in (m.get("columns") or ()) if c
+        for t in (c.get("tests") or ())
+    )
+    for t in tests:
+        if (
+            isinstance(t, dict)
+            and isinstance(av := t.get("accepted_values"), dict)
+            and "arguments" in av
+            and "values" not in av
+        ):
+            problems.append(
+                "models/schema.yml: 'accepted_values' should be 'values: [...]' (not under 'arguments')"
+            )
+    return problems, warnings
+
+
+def check_sources_yaml(data: Dict[str, Any]) -> Findings:
+    problems: List[str] = []
+    warnings: List[str] = []
     if not data:
-        return
-    if data.get("version") not in (2, "2"):
-        WARNINGS.append("models/sources.yml: 'version: 2' is recommended")
+        return problems, warnings
+    if data.get("version") not in _V2:
+        warnings.append("models/sources.yml: 'version: 2' is recommended")
     sources = data.get("sources")
     if not isinstance(sources, list) or not sources:
-        PROBLEMS.append("models/sources.yml: at least one source should be defined")
-        return
+        problems.append("models/sources.yml: at least one source should be defined")
+        return problems, warnings
     # Suggest database key for BigQuery (non-blocking)
     for s in sources:
         if "database" not in s:
-            WARNINGS.append(
+            warnings.append(
                 f"models/sources.yml: source '{s.get('name')}' has no 'database' (BigQuery project); explicit database is recommended"
             )
+    return problems, warnings
+
 
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Static audit for dbt project setup.",
+        epilog=f"Auditing {ROOT} ({_ROOT_SOURCE}).",
+    )
+    parser.add_argument(
+        "--json",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="print the machine-readable JSON section (default: only when stdout is not a TTY)",
+    )
+    args = parser.parse_args(argv)
+    emit_json = args.json if args.json is not None else not sys.stdout.isatty()
 
-def main() -> int:
-    check_project_and_profile()
-    check_paths()
-    check_models_yaml()
-    check_sources_yaml()
+    parsed, problems = load_all_yaml({
+        "project": _DBT_PROJECT,
+        "profiles": _PROFILES,
+        "schema": _MODELS_SCHEMA,
+        "sources": _MODELS_SOURCES,
+    })
+    warnings: List[str] = []
+    for check_problems, check_warnings in (
+        check_project_and_profile(parsed["project"], parsed["profiles"]),
+        check_paths(parsed["project"]),
+        check_models_yaml(parsed["schema"]),
+        check_sources_yaml(parsed["sources"]),
+    ):
+        problems.extend(check_problems)
+        warnings.extend(check_warnings)
 
     print("DBT SETUP AUDIT REPORT\n========================\n")
-    if PROBLEMS:
+    if problems:
         print("Blocking issues:")
-        for p in PROBLEMS:
+        for p in problems:
             print(f"- [ERROR] {p}")
         print()
     else:
         print("No blocking issues found.\n")
 
-    if WARNINGS:
+    if warnings:
         print("Advisories:")
-        for w in WARNINGS:
+        for w in warnings:
             print(f"- [WARN] {w}")
         print()
 
     # Machine-readable output (optional)
-    result = {"problems": PROBLEMS, "warnings": WARNINGS}
-    print("JSON:")
-    print(json.dumps(result, indent=2))
+    if emit_json:
+        result = {"problems": problems, "warnings": warnings}
+        print("JSON:")
+        print(json.dumps(result, indent=2))
 
-    return 1 if PROBLEMS else 0
+    return 1 if problems else 0
 
 
 if __name__ == "__main__":
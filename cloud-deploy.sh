@@ -49,7 +49,8 @@ gcloud services enable run.googleapis.com
 gcloud services enable cloudscheduler.googleapis.com
 gcloud services enable bigquery.googleapis.com
 
-# Create a simple web service for Cloud Run
+# Create a simple web service for Cloud Run if the repo doesn't ship one
+if [[ ! -f web_service.py ]]; then
 echo "🌐 Creating web service for Cloud Run..."
 cat > web_service.py <<'EOF'
 from flask import Flask, request, jsonify
@@ -125,6 +126,7 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
     app.run(host='0.0.0.0', port=port, debug=False)
 EOF
+fi
 
 # Create Dockerfile for Cloud Run
 echo "📦 Creating Dockerfile for Cloud Run deployment..."
@@ -145,7 +147,7 @@ COPY requirements.txt .
 RUN pip install --no-cache-dir -r requirements.txt
 
 # Install dbt and Flask
-RUN pip install dbt-core dbt-bigquery flask gunicorn
+RUN pip install dbt-core dbt-bigquery flask gunicorn orjson
 
 # Copy dbt project files
 COPY . .
@@ -161,8 +163,8 @@ ENV PORT=8080
 # Expose port
 EXPOSE 8080
 
-# Run web service with Python directly
-CMD ["python", "web_service.py"]
+# Run web service under gunicorn
+CMD ["gunicorn", "-c", "gunicorn_conf.py", "web_service:app"]
 EOF
 
 
@@ -0,0 +1,17 @@
+"""Gunicorn settings for the Cloud Run web service.
+
+Run with: gunicorn -c gunicorn_conf.py web_service:app
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# A single worker process: deploy state and the one-at-a-time deploy queue
+# live in process memory, so more processes would each accept their own
+# deploy and report their own last_execution. Concurrency comes from threads.
+workers = 1
+worker_class = "gthread"
+threads = 8
+
+preload_app = True
+timeout = 60
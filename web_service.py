@@ -1,72 +1,190 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request
 import subprocess
 import os
 import logging
+import collections
+import queue
+import signal
 import threading
-from datetime import datetime
+import time
+from types import MappingProxyType
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    import json
+    def _dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
 
 app = Flask(__name__)
+app.json.compact = True
 logging.basicConfig(level=logging.INFO)
 
-# Global variable to track last execution
-last_execution = {"time": None, "status": None, "message": None}
+def jresp(obj, status=200):
+    """JSON response serialized with orjson when available."""
+    return app.response_class(_dumps(obj), status=status, mimetype='application/json')
+
+# Global variable to track last execution. It is an immutable snapshot that
+# writers replace wholesale, so readers need no lock and never see a
+# half-updated record.
+last_execution = MappingProxyType({"time": None, "status": None, "message": None})
+
+DEPLOY_TIMEOUT = 1200  # 20 minutes timeout
+
+# Environment for deploy.sh: the service's environment with the prod target
+# forced, built once since the service environment is fixed at startup
+_DBT_ENV = os.environ | {
+    'DBT_TARGET': 'prod',
+    'BIGQUERY_DATASET': 'transformer_dbt_prod',
+}
+
+# Deploys run one at a time on a single background worker; a /run request
+# while one is queued or running is rejected rather than piling up.
+_jobs = queue.Queue(maxsize=1)
+_pending = False
+_state_lock = threading.Lock()  # guards _pending and the worker thread
+
+# (epoch second, formatted UTC timestamp) for now_iso; a single tuple so
+# concurrent readers never see one field updated without the other
+_ts_cache = (0, "")
+
+def now_iso():
+    """Current UTC time as ISO 8601, formatted at most once per second."""
+    global _ts_cache
+    t = int(time.time())
+    cached = _ts_cache
+    if cached[0] != t:
+        cached = _ts_cache = (t, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t)))
+    return cached[1]
+
+# The invariant part of the health check body, serialized once; handlers
+# only serialize the timestamp and last_execution
+_HEALTH_BASE = {"status": "healthy", "service": "dbt-transformer"}
+_HEALTH_PREFIX = _dumps(_HEALTH_BASE)[:-1] + b',"timestamp":'
 
 @app.route('/', methods=['GET'])
 def health_check():
-    return jsonify({
-        "status": "healthy",
-        "service": "dbt-transformer",
-        "timestamp": datetime.now().isoformat(),
-        "last_execution": last_execution
-    })
+    snapshot = dict(last_execution)
+    body = b''.join((
+        _HEALTH_PREFIX, _dumps(now_iso()),
+        b',"last_execution":', _dumps(snapshot), b'}'
+    ))
+    return app.response_class(body, mimetype='application/json')
 
-@app.route('/run', methods=['POST', 'GET'])
-def run_dbt():
-    def execute_dbt():
-        global last_execution
+def _set_last_execution(**fields):
+    # Only the deploy worker thread writes, so read-modify-swap is safe
+    global last_execution
+    last_execution = MappingProxyType({**last_execution, **fields})
+
+def _kill_process_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+def execute_dbt():
+    try:
+        logging.info("Starting dbt deployment...")
+        _set_last_execution(time=now_iso(), status="running", message=None)
+        
+        # Run dbt deployment, streaming its output to the log and keeping
+        # only the last lines for the status message
+        # deploy.sh runs in its own session so a timeout can kill dbt and any
+        # other children with it; they hold the stdout pipe open otherwise
+        proc = subprocess.Popen(
+            ['./deploy.sh', 'prod', 'run'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors='replace',
+            bufsize=1,
+            env=_DBT_ENV,
+            start_new_session=True
+        )
+        timed_out = threading.Event()
+        def _kill():
+            timed_out.set()
+            _kill_process_group(proc)
+        killer = threading.Timer(DEPLOY_TIMEOUT, _kill)
+        killer.start()
+        tail = collections.deque(maxlen=200)
         try:
-            logging.info("Starting dbt deployment...")
-            last_execution["time"] = datetime.now().isoformat()
-            last_execution["status"] = "running"
-            
-            # Set environment variables
-            env = os.environ.copy()
-            env['DBT_TARGET'] = 'prod'
-            env['BIGQUERY_DATASET'] = 'transformer_dbt_prod'
-            
-            # Run dbt deployment
-            result = subprocess.run(
-                ['./deploy.sh', 'prod', 'run'], 
-                capture_output=True, 
-                text=True,
-                env=env,
-                timeout=1200  # 20 minutes timeout
-            )
+            for line in proc.stdout:
+                logging.info(line.rstrip())
+                tail.append(line)
+            returncode = proc.wait()
+        finally:
+            killer.cancel()
+            if proc.poll() is None:
+                # The read loop failed; don't leave the deploy running
+                # unreaped while the worker goes idle
+                _kill_process_group(proc)
+                proc.wait()
+            proc.stdout.close()
+        output = "".join(tail)
+        
+        if timed_out.is_set():
+            logging.error(f"dbt deployment timed out after {DEPLOY_TIMEOUT} seconds")
+            _set_last_execution(status="error", message=f"Error: deployment timed out after {DEPLOY_TIMEOUT} seconds")
+        elif returncode == 0:
+            logging.info("dbt deployment completed successfully")
+            _set_last_execution(status="success", message="Deployment completed successfully")
+        else:
+            logging.error(f"dbt deployment failed with exit code {returncode}")
+            _set_last_execution(status="error", message=f"Deployment failed: {output[-500:]}")
             
-            if result.returncode == 0:
-                logging.info("dbt deployment completed successfully")
-                last_execution["status"] = "success"
-                last_execution["message"] = "Deployment completed successfully"
-            else:
-                logging.error(f"dbt deployment failed: {result.stderr}")
-                last_execution["status"] = "error"
-                last_execution["message"] = f"Deployment failed: {result.stderr[-500:]}"
-                
-        except Exception as e:
-            logging.error(f"Error running dbt: {str(e)}")
-            last_execution["status"] = "error"
-            last_execution["message"] = f"Error: {str(e)}"
-    
-    # Run in background thread to avoid timeout
-    thread = threading.Thread(target=execute_dbt)
-    thread.start()
+    except Exception as e:
+        logging.error(f"Error running dbt: {str(e)}")
+        _set_last_execution(status="error", message=f"Error: {str(e)}")
+
+def _worker():
+    global _pending
+    while True:
+        _jobs.get()
+        try:
+            execute_dbt()
+        finally:
+            with _state_lock:
+                _pending = False
+            _jobs.task_done()
+
+_worker_thread = None
+
+def _ensure_worker():
+    # Started on first use rather than at import: under gunicorn --preload the
+    # module is imported in the master, and threads do not survive the fork.
+    global _worker_thread
+    if _worker_thread is None or not _worker_thread.is_alive():
+        _worker_thread = threading.Thread(target=_worker, name="dbt-worker", daemon=True)
+        _worker_thread.start()
+
+@app.route('/run', methods=['POST', 'GET'])
+def run_dbt():
+    global _pending
+    with _state_lock:
+        _ensure_worker()
+        busy = _pending
+        if not busy:
+            try:
+                _jobs.put_nowait(True)
+                _pending = True
+            except queue.Full:
+                busy = True
+    if busy:
+        return jresp({
+            "status": "busy",
+            "message": "dbt deployment already in progress",
+            "timestamp": now_iso()
+        }, 429)
     
-    return jsonify({
+    return jresp({
         "status": "started",
         "message": "dbt deployment started in background",
-        "timestamp": datetime.now().isoformat()
-    })
+        "timestamp": now_iso()
+    }, 202)
 
 if __name__ == '__main__':
+    # Local development only; the container runs under gunicorn (gunicorn_conf.py)
     port = int(os.environ.get('PORT', 8080))
     app.run(host='0.0.0.0', port=port, debug=False)